@@ -1,25 +1,121 @@
 from flask import Flask, render_template, jsonify, send_from_directory
+from flask_compress import Compress
+from functools import lru_cache
+import os
+import numpy as np
+import orjson
 import pandas as pd
 import plotly.express as px
 import plotly.figure_factory as ff
 import plotly.io as pio
-import json
+
+# Use orjson's C-accelerated encoder for all Plotly JSON serialization
+pio.json.config.default_engine = 'orjson'
 
 # Initialize Flask application
 app = Flask(__name__)
 
+# Compress responses; Plotly figure JSON is highly redundant and shrinks ~5-10x
+app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/html']
+Compress(app)
+
+# Path of the preprocessed Parquet cache built from the raw CSV files
+PARQUET_PATH = 'data/iraste_nxt.parquet'
+
+# Build the Parquet cache from the raw CSVs on first run
+# Parquet stores typed binary columns, so later loads skip CSV parsing entirely
+def _ensure_parquet():
+    if os.path.exists(PARQUET_PATH):
+        return
+
+    # Read only the columns the app uses, with explicit dtypes so the parser
+    # skips inference and the narrow/categorical columns stay small in memory
+    read_kwargs = dict(
+        usecols=['Date', 'Time', 'Lat', 'Long', 'Alert', 'Vehicle', 'Speed'],
+        dtype={'Lat': 'float32', 'Long': 'float32', 'Speed': 'float32',
+               'Alert': 'category', 'Vehicle': 'category'},
+        parse_dates=['Date'],
+    )
+    # Stream each CSV in chunks and take the 1% sample per chunk, so peak
+    # memory while building the cache stays bounded by the chunk size rather
+    # than the full file, and cleaning only ever touches sampled rows
+    def read_sampled(path):
+        return pd.concat([chunk.sample(frac=0.01, random_state=42)
+                          for chunk in pd.read_csv(path, chunksize=200_000, **read_kwargs)],
+                         axis=0)
+
+    df = pd.concat([read_sampled('data/iraste_nxt_cas.csv'),
+                    read_sampled('data/iraste_nxt_casdms.csv')], axis=0)
+    # concat falls back to object when the chunks/files carry different
+    # category sets, so re-cast to keep the dictionary-encoded columns
+    df['Alert'] = df['Alert'].astype('category')
+    df['Vehicle'] = df['Vehicle'].astype('category')
+    df = df.drop_duplicates()  # Remove duplicates
+
+    # Parse Time and derive DayOfWeek once here, so routes read ready-made
+    # columns instead of re-running pd.to_datetime per request; the dropna
+    # runs after the coercion so unparseable times leave no NaT in the cache
+    df['Time'] = pd.to_datetime(df['Time'], errors='coerce')
+    df = df.dropna()  # Remove missing values, including coerced times
+    df['DayOfWeek'] = df['Date'].dt.day_name().astype('category')
+    df.to_parquet(PARQUET_PATH, compression='zstd')
+
 # Function to load and preprocess data
+# Cached so the data is read and cleaned only once per process instead of on every request
+@lru_cache(maxsize=1)
 def load_data():
-    # Read CSV data files into pandas DataFrames
-    df = pd.read_csv('data/iraste_nxt_cas.csv')
-    df1 = pd.read_csv('data/iraste_nxt_casdms.csv')
-    
-    # Concatenate both DataFrames and clean the data
-    df = pd.concat([df, df1], axis=0)
-    df = df.drop_duplicates()  # Remove duplicates
-    df = df.dropna()  # Remove missing values
-    df = df.sample(frac=0.01, random_state=42)  # Take a random sample of 1% of the data
-    return df
+    _ensure_parquet()
+    return pd.read_parquet(PARQUET_PATH)
+
+# Alert types considered safety-related, shared by the safety routes
+SAFETY_ALERTS = ['cas_ldw', 'cas_hmw', 'hard_brake', 'cas_pcw', 'cas_fcw']
+
+# Narrow cached accessors: the sampled frame never changes after load, so
+# each aggregation is computed on first use and routes pull only the small
+# table they actually plot
+
+@lru_cache(maxsize=1)
+def get_alert_counts():
+    alert_counts = load_data()['Alert'].value_counts().reset_index()
+    alert_counts.columns = ['Alert', 'Frequency']
+    return alert_counts
+
+@lru_cache(maxsize=1)
+def get_safety_df():
+    df = load_data()
+    # Filter on the integer category codes rather than the strings: map the
+    # safety alerts to their codes once, then mask with a flat np.isin pass
+    safety_codes = np.flatnonzero(df['Alert'].cat.categories.isin(SAFETY_ALERTS))
+    mask = np.isin(df['Alert'].cat.codes.to_numpy(), safety_codes)
+    safety_df = df[mask].copy()
+    # Drop the non-safety categories so counts and box plots only show the
+    # alerts actually present, as they did with plain string columns
+    safety_df['Alert'] = safety_df['Alert'].cat.remove_unused_categories()
+    return safety_df
+
+@lru_cache(maxsize=1)
+def get_safety_counts():
+    safety_counts = get_safety_df()['Alert'].value_counts().reset_index()
+    safety_counts.columns = ['Alert', 'Frequency']
+    return safety_counts
+
+@lru_cache(maxsize=1)
+def get_safety_speed_freq():
+    # Count alerts per speed via factorize + bincount, which skips pandas'
+    # group-index machinery and stays in flat integer arrays
+    speed_codes, speed_values = pd.factorize(get_safety_df()['Speed'].to_numpy(), sort=True)
+    return pd.DataFrame({
+        'Speed': speed_values,
+        'Alert': np.bincount(speed_codes, minlength=len(speed_values)),
+    })
+
+@lru_cache(maxsize=1)
+def get_speed_category_counts():
+    df = load_data()
+    speed_category = pd.cut(df['Speed'], bins=[-np.inf, 60, 80, np.inf],
+                            labels=['Low', 'Medium', 'High'], right=False)
+    return df.groupby([speed_category.rename('Speed_Category'),
+                       df['Alert']]).size().reset_index(name='Count')
 
 # Route to perform spatial analysis and display map of alert occurrences
 @app.route('/spatial-analysis')
@@ -29,19 +125,16 @@ def spatial_analysis():
     fig = px.density_mapbox(df, lat='Lat', lon='Long', radius=10, zoom=5, 
                              mapbox_style='carto-positron',
                              title='Spatial Distribution of Alert Occurrences')
-    fig.update_layout(mapbox_center={'lat': df['Lat'].mean(), 'lon': df['Long'].mean()})
+    # float() unwraps the numpy float32 scalars for the layout dict
+    fig.update_layout(mapbox_center={'lat': float(df['Lat'].mean()), 'lon': float(df['Long'].mean())})
     
-    return jsonify(fig.to_json())
+    return jsonify(pio.to_json(fig, validate=False))
 
 # Route to analyze alert frequency and vehicle alert comparison
 @app.route('/alert-frequency')
 def alert_frequency():
     df = load_data()
-    df['Date'] = pd.to_datetime(df['Date'])
-    df['DayOfWeek'] = df['Date'].dt.day_name()
-    df['Time'] = pd.to_datetime(df['Time'], errors='coerce')
-    df['Speed'] = df['Speed'].astype(float)
-    
+
     # Alert Frequency Analysis by Day of Week
     fig1 = px.histogram(df, x='DayOfWeek', color='Alert', 
                         title='Alert Frequency by Day of Week')
@@ -53,35 +146,25 @@ def alert_frequency():
     fig2.update_layout(xaxis_title='Speed', yaxis_title='Alert Frequency')
     
     # Speed vs Time with Alert Events
-    fig_speed_time = px.scatter(df, x='Time', y='Speed', color='Alert', 
+    fig_speed_time = px.scatter(df, x='Time', y='Speed', color='Alert',
                                 title='Speed vs. Time with Alert Events')
-    fig_speed_time_json = json.loads(fig_speed_time.to_json())
-    
-    return jsonify({
-        'day_of_week_chart': fig1.to_json(),
-        'speed_alert_chart': fig2.to_json(),
-        'speed_time': fig_speed_time_json
+
+    # Each figure is serialized once by plotly's encoder; speed_time keeps its
+    # contract as a parsed object by embedding the encoded figure as a raw
+    # fragment instead of re-parsing it for jsonify
+    payload = orjson.dumps({
+        'day_of_week_chart': pio.to_json(fig1, validate=False),
+        'speed_alert_chart': pio.to_json(fig2, validate=False),
+        'speed_time': orjson.Fragment(pio.to_json(fig_speed_time, validate=False))
     })
+    return app.response_class(payload, mimetype='application/json')
 
 # Route to analyze vehicle speed and categorize alerts based on speed
 @app.route('/speed-analysis')
 def speed_analysis():
     df = load_data()
-    df['Speed'] = df['Speed'].astype(float)
     df_sorted = df.sort_values(by='Time')
-    df_sorted['Time'] = pd.to_datetime(df_sorted['Time'], errors='coerce')
-    
-    # Speed categorization function
-    def categorize_speed(speed):
-        if speed < 60:
-            return 'Low'
-        elif 60 <= speed < 80:
-            return 'Medium'
-        else:
-            return 'High'
-    
-    df_sorted['Speed_Category'] = df_sorted['Speed'].apply(categorize_speed)
-    
+
     # Speed vs Time Scatter Plot
     fig1 = px.scatter(df_sorted, x='Time', y='Speed', color='Alert', 
                       title='Speed vs. Time with Alert Events')
@@ -90,36 +173,35 @@ def speed_analysis():
     fig2 = px.histogram(df_sorted, x='Speed', nbins=20, 
                         title='Distribution of Speed')
     
-    # Alerts by Speed Category
-    grouped_data = df_sorted.groupby(['Speed_Category', 'Alert']).size().reset_index(name='Count')
-    fig3 = px.bar(grouped_data, x='Speed_Category', y='Count', color='Alert', 
+    # Alerts by Speed Category (cached on first use)
+    fig3 = px.bar(get_speed_category_counts(), x='Speed_Category', y='Count', color='Alert',
                   barmode='group', title='Alerts Count by Speed Category')
     
     return jsonify({
-        'speed_time_chart': fig1.to_json(),
-        'speed_distribution_chart': fig2.to_json(),
-        'speed_category_chart': fig3.to_json()
+        'speed_time_chart': pio.to_json(fig1, validate=False),
+        'speed_distribution_chart': pio.to_json(fig2, validate=False),
+        'speed_category_chart': pio.to_json(fig3, validate=False)
     })
 
 # Route to calculate and display correlation analysis
 @app.route('/correlation-analysis')
 def correlation_analysis():
     df = load_data()
-    df1 = df.copy()
-    
-    # Prepare data for correlation calculation
-    df1['Alert'] = df1['Alert'].astype('category').cat.codes
-    df1['Date'] = pd.to_datetime(df1['Date'])
-    df1['DayOfWeek'] = df1['Date'].dt.day_name()
-    df1['HourOfDay'] = df1['Date'].dt.hour
-    df1['Date'] = df1['Date'].astype('category').cat.codes
-    df1['Time'] = pd.to_datetime(df1['Time'], errors='coerce')
-    df1['DayOfWeek'] = df1['DayOfWeek'].astype('category').cat.codes
-    df1['HourOfDay'] = df1['HourOfDay'].astype('category').cat.codes
-    df1.drop(['HourOfDay'], axis=1, inplace=True)
+
+    # Build a tight all-numeric frame for the correlation instead of copying
+    # the full frame and converting columns in place; the old HourOfDay column
+    # was computed only to be dropped again, so it is gone entirely
+    num_df = pd.DataFrame({
+        'Lat': df['Lat'].to_numpy(),
+        'Long': df['Long'].to_numpy(),
+        'Speed': df['Speed'].to_numpy(),
+        'Alert': df['Alert'].cat.codes.to_numpy(),
+        'DayOfWeek': df['Date'].dt.dayofweek.to_numpy(),
+        'Date': df['Date'].astype('int64') // 10**9,  # epoch seconds
+    })
 
     # Calculate correlation matrix
-    correlation_matrix = df1.corr()
+    correlation_matrix = num_df.corr()
     
     # Create a heatmap for the correlation matrix
     fig = ff.create_annotated_heatmap(
@@ -130,86 +212,72 @@ def correlation_analysis():
     )
     fig.update_layout(title='Correlation Between Alert Occurrence and Road Conditions')
     
-    return jsonify(fig.to_json())
+    return jsonify(pio.to_json(fig, validate=False))
 
 # Route to analyze driver behavior based on alert counts
 @app.route('/driver-behavior')
 def driver_behavior():
-    df = load_data()
-    alert_counts = df['Alert'].value_counts().reset_index()
-    alert_counts.columns = ['Alert', 'Frequency']
-    
-    # Create a pie chart of alert frequencies
-    fig = px.pie(alert_counts, values='Frequency', names='Alert', 
+    # Create a pie chart of alert frequencies (cached on first use)
+    fig = px.pie(get_alert_counts(), values='Frequency', names='Alert',
                  title='Distribution of Driver Alerts')
     
-    return jsonify(fig.to_json())
+    return jsonify(pio.to_json(fig, validate=False))
 
 # Route for analyzing safety-related alerts
 @app.route('/safety-impact')
 def safety_impact():
-    df = load_data()
-    safety_df = df[df['Alert'].isin(['cas_ldw', 'cas_hmw', 'hard_brake', 'cas_pcw', 'cas_fcw'])]
-    
-    # Speed vs Frequency of Safety-Related Alerts
-    fig1 = px.scatter(safety_df.groupby('Speed')['Alert'].count().reset_index(), 
+    # Speed vs Frequency of Safety-Related Alerts (cached on first use)
+    fig1 = px.scatter(get_safety_speed_freq(),
                       x='Speed', y='Alert',
                       title='Speed vs. Frequency of Safety-Related Alerts')
-    
+
     # Box plot of Speed Distribution during Safety Alerts
-    fig2 = px.box(safety_df, x='Alert', y='Speed', 
+    fig2 = px.box(get_safety_df(), x='Alert', y='Speed',
                   title='Speed Distribution During Safety Alerts')
     
     return jsonify({
-        'safety_speed_frequency': fig1.to_json(),
-        'safety_speed_distribution': fig2.to_json()
+        'safety_speed_frequency': pio.to_json(fig1, validate=False),
+        'safety_speed_distribution': pio.to_json(fig2, validate=False)
     })
 
 # Route for combined safety analysis and alerts visualization
 @app.route('/safety_analysis')
 def safety_analysis():
-    df = load_data()
-    
-    # Filter for safety-related alerts
-    safety_alerts = ['cas_ldw', 'cas_hmw', 'hard_brake', 'cas_pcw', 'cas_fcw']
-    safety_df = df[df['Alert'].isin(safety_alerts)]
-
-    # Safety-related Alerts Frequency
-    safety_counts = safety_df['Alert'].value_counts().reset_index()
-    safety_counts.columns = ['Alert', 'Frequency']
-    
-    # Pie chart for safety-related alerts distribution
-    fig_safety_pie = px.pie(safety_counts, values='Frequency', names='Alert', 
+    # Pie chart for safety-related alerts distribution (cached on first use)
+    fig_safety_pie = px.pie(get_safety_counts(), values='Frequency', names='Alert',
                             title='Distribution of Safety-Related Alerts')
-    fig_safety_pie_json = json.loads(fig_safety_pie.to_json())
 
     # Speed vs Frequency of Safety Alerts
-    safety_speed_freq = safety_df.groupby('Speed')['Alert'].count().reset_index()
-    fig_safety_speed = px.scatter(safety_speed_freq, x='Speed', y='Alert', 
-                                  title='Speed vs. Frequency of Safety-Related Alerts', 
+    fig_safety_speed = px.scatter(get_safety_speed_freq(), x='Speed', y='Alert',
+                                  title='Speed vs. Frequency of Safety-Related Alerts',
                                   trendline='ols')
-    fig_safety_speed_json = json.loads(fig_safety_speed.to_json())
 
-    return jsonify({
-        'safety_pie': fig_safety_pie_json,
-        'safety_speed': fig_safety_speed_json
+    # Both keys stay parsed objects: the figures are encoded once by plotly's
+    # encoder and embedded as raw fragments in the combined payload
+    payload = orjson.dumps({
+        'safety_pie': orjson.Fragment(pio.to_json(fig_safety_pie, validate=False)),
+        'safety_speed': orjson.Fragment(pio.to_json(fig_safety_speed, validate=False))
     })
+    return app.response_class(payload, mimetype='application/json')
 
-# Home route to show summary and visualizations
-@app.route('/')
-def home():
+# The home page figures and locations list depend only on the immutable
+# sampled frame, so their HTML snippets are built once and reused; to_html
+# runs a full figure serialization plus JS scaffolding per call otherwise
+@lru_cache(maxsize=1)
+def get_home_artifacts():
     df = load_data()
+
+    # Summary table; describe(include='all') runs per-column uniqueness over
+    # the string-like columns, so it is worth caching with the figures
     summary = df.describe(include='all').to_html(classes='dataframe', border=0)
 
     # Create heatmap for spatial analysis
     fig1 = px.density_mapbox(df, lat='Lat', lon='Long', radius=10, zoom=5, mapbox_style='carto-positron',
                              title='Spatial Distribution of Alert Occurrences')
-    fig1.update_layout(mapbox_center={'lat': df['Lat'].mean(), 'lon': df['Long'].mean()})
+    fig1.update_layout(mapbox_center={'lat': float(df['Lat'].mean()), 'lon': float(df['Long'].mean())})
     heatmap_html = pio.to_html(fig1, full_html=False)
 
     # Alert frequency by day of the week
-    df['Date'] = pd.to_datetime(df['Date'])
-    df['DayOfWeek'] = df['Date'].dt.day_name()
     freq_data = df['DayOfWeek'].value_counts().reset_index()
     freq_data.columns = ['Day', 'Frequency']
     fig2 = px.bar(freq_data, x='Day', y='Frequency', title='Alert Frequency by Day of the Week',
@@ -221,39 +289,50 @@ def home():
                         labels={'Speed': 'Speed (km/h)', 'count': 'Number of Vehicles'})
     speed_analysis_html = pio.to_html(fig3, full_html=False)
 
-    locations = [{
-        'lat': row['Lat'], 
-        'lng': row['Long'], 
-        'alert': row['Alert'],
-        'date': row['Date'],
-        'time': row['Time'],
-        'vehicle': row['Vehicle'],
-        'speed': row['Speed']
-    } for _, row in df.iterrows()]
-
-    return render_template('index.html', summary=summary, 
-                           heatmap=heatmap_html, 
-                           alert_frequency=alert_frequency_html, 
+    # Serialize the locations once with orjson and embed the string as a raw
+    # JS literal, instead of letting Jinja iterate and escape every record.
+    # Time is formatted back to the bare HH:MM:SS string the page always
+    # showed; the parsed column would otherwise carry the cache build date
+    locations = df[['Lat', 'Long', 'Alert', 'Date', 'Vehicle', 'Speed']].assign(
+        Time=df['Time'].dt.strftime('%H:%M:%S')
+    )[['Lat', 'Long', 'Alert', 'Date', 'Time', 'Vehicle', 'Speed']].rename(
+        columns={'Lat': 'lat', 'Long': 'lng', 'Alert': 'alert', 'Date': 'date',
+                 'Time': 'time', 'Vehicle': 'vehicle', 'Speed': 'speed'}
+    ).to_dict(orient='records')
+    # default=str covers the pd.Timestamp values in date, which orjson
+    # refuses as datetime subclasses; str() matches how Jinja rendered them
+    locations_json = orjson.dumps(locations, option=orjson.OPT_SERIALIZE_NUMPY,
+                                  default=str).decode()
+
+    return summary, heatmap_html, alert_frequency_html, speed_analysis_html, locations_json
+
+# Home route to show summary and visualizations
+@app.route('/')
+def home():
+    summary, heatmap_html, alert_frequency_html, speed_analysis_html, locations_json = get_home_artifacts()
+
+    # The template embeds locations_json via {{ locations_json|safe }}
+    return render_template('index.html', summary=summary,
+                           heatmap=heatmap_html,
+                           alert_frequency=alert_frequency_html,
                            speed_analysis=speed_analysis_html,
-                           locations=locations)
+                           locations_json=locations_json)
 
 # Route to get cleaned data for coordinates
 @app.route('/data/coordinates')
 def get_coordinates():
+    # load_data() already drops rows with missing values, so no per-row NaN handling is needed
     df = load_data()
-    data = []
-    for _, row in df.iterrows():
-        record={
-           "alert": row['Alert'] if pd.notna(row['Alert']) else '',
-            "date": row['Date'] if pd.notna(row['Date']) else '',
-            "time": row['Time'] if pd.notna(row['Time']) else '',
-            "lat": row['Lat'] if pd.notna(row['Lat']) else None,  # Handle NaN latitude
-            "long": row['Long'] if pd.notna(row['Long']) else None,  # Handle NaN longitude
-            "vehicle": row['Vehicle'] if pd.notna(row['Vehicle']) else '',
-            "speed": row['Speed'] if pd.notna(row['Speed']) else 0  # Handle NaN speed
-        }
-        data.append(record)
-    return jsonify(data)
+    # Format the parsed Date/Time back to the plain strings the endpoint has
+    # always returned, rather than letting jsonify render Timestamps as HTTP dates
+    records = df[['Alert', 'Lat', 'Long', 'Vehicle', 'Speed']].assign(
+        Date=df['Date'].dt.strftime('%Y-%m-%d'),
+        Time=df['Time'].dt.strftime('%H:%M:%S'),
+    ).rename(
+        columns={'Alert': 'alert', 'Date': 'date', 'Time': 'time',
+                 'Lat': 'lat', 'Long': 'long', 'Vehicle': 'vehicle', 'Speed': 'speed'}
+    ).to_dict(orient='records')
+    return jsonify(records)
 
 # Ensure the app runs when accessed directly
 if __name__ == '__main__':